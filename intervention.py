@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 import argparse
-import json
+import bisect
+import functools
 import os
 import re
 import subprocess
 import sys
-from collections import defaultdict
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from urllib.parse import urlparse
 
+import orjson
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
@@ -18,6 +25,18 @@ from rich.text import Text
 
 console = Console()
 
+# (lignes max du dictionnaire, threads ffuf max, timeout en secondes)
+FFUF_SIZE_BUCKETS = [
+    (10_000, 25, 300),
+    (200_000, 50, 1800),
+    (None, 100, 3600),
+]
+
+NUCLEI_DEFAULT_RATE_LIMIT = 150
+
+_TECH_NAME_TRANS = str.maketrans({" ": "-", "_": "-", ".": None})
+_DETECT_SUFFIX_RE = re.compile(r"(?:^|-)detect(?:ion)?(?=-|$)")
+
 
 def ensure_repositories(dict_path: str, nuclei_templates_path: str):
     """Vérifie et clone les répertoires nécessaires s'ils n'existent pas"""
@@ -44,7 +63,7 @@ def ensure_repositories(dict_path: str, nuclei_templates_path: str):
                 shutil.rmtree(one_list_dir)
             
             subprocess.run(
-                ["git", "clone", "https://github.com/six2dez/OneListForAll.git", str(one_list_dir)],
+                ["git", "clone", "--depth=1", "--single-branch", "https://github.com/six2dez/OneListForAll.git", str(one_list_dir)],
                 check=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE
@@ -59,7 +78,11 @@ def ensure_repositories(dict_path: str, nuclei_templates_path: str):
             console.print("[red]Erreur: git n'est pas installé ou n'est pas dans le PATH[/red]")
             sys.exit(1)
     
-    if nuclei_dir.exists() and any(nuclei_dir.rglob("*.yaml")):
+    # Chemin rapide : la template utilisée par la détection ; sinon on s'arrête au premier .yaml trouvé
+    # pour ne jamais supprimer un répertoire de templates non vide (dossier personnalisé, ancienne arborescence)
+    if (nuclei_dir / "http/technologies/tech-detect.yaml").exists() or (
+        nuclei_dir.exists() and any(nuclei_dir.rglob("*.yaml"))
+    ):
         console.print(f"[green]✓[/green] nuclei-templates trouvé")
     else:
         console.print(f"[cyan]📥[/cyan] Clonage de nuclei-templates...")
@@ -73,7 +96,7 @@ def ensure_repositories(dict_path: str, nuclei_templates_path: str):
                 shutil.rmtree(nuclei_dir)
             
             subprocess.run(
-                ["git", "clone", "https://github.com/projectdiscovery/nuclei-templates.git", str(nuclei_dir)],
+                ["git", "clone", "--depth=1", "--single-branch", "https://github.com/projectdiscovery/nuclei-templates.git", str(nuclei_dir)],
                 check=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE
@@ -89,19 +112,81 @@ def ensure_repositories(dict_path: str, nuclei_templates_path: str):
             sys.exit(1)
 
 
+def wordlist_cache_file() -> Path:
+    """Fichier de cache des tailles de dictionnaires, hors du dépôt OneListForAll"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "intervention" / "wordlist_sizes.json"
+
+
+def load_wordlist_cache() -> Dict[str, Dict]:
+    """Charge le cache des tailles de dictionnaires (vide s'il est absent ou illisible)"""
+    try:
+        cache = orjson.loads(wordlist_cache_file().read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_wordlist_cache(cache: Dict[str, Dict]):
+    """Écrit le cache des tailles de dictionnaires, sans échouer si c'est impossible"""
+    cache_file = wordlist_cache_file()
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(orjson.dumps(cache))
+    except OSError:
+        pass
+
+
+def wordlist_line_count(wordlist: Path, cache: Dict[str, Dict]) -> int:
+    """Compte les lignes d'un dictionnaire, en réutilisant le cache si le fichier n'a pas changé"""
+    key = str(wordlist.resolve())
+    stat = wordlist.stat()
+    entry = cache.get(key)
+    if isinstance(entry, dict) and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("bytes") == stat.st_size:
+        return entry["lines"]
+    
+    count = 0
+    last_chunk = b""
+    with open(wordlist, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            count += chunk.count(b"\n")
+            last_chunk = chunk
+    if last_chunk and not last_chunk.endswith(b"\n"):
+        count += 1
+    
+    cache[key] = {"mtime_ns": stat.st_mtime_ns, "bytes": stat.st_size, "lines": count}
+    return count
+
+
 class Intervention:
     def __init__(self, dict_path: str, nuclei_templates_path: str, mode: str = "long", 
-                 occurrence: int = 10, verbose: bool = False):
+                 occurrence: int = 10, verbose: bool = False, parallel: int = 8,
+                 threads: int = 400, global_rate: int = 0):
         self.dict_path = Path(dict_path)
         self.nuclei_templates_path = Path(nuclei_templates_path)
         self.mode = mode
         self.occurrence = occurrence
         self.verbose = verbose
+        self.parallel = max(1, parallel)
+        self.threads = max(2, threads)
+        self.global_rate = max(0, global_rate)
         self.tech_to_dict = {}
-        self.detected_techs = defaultdict(set)
         self.ffuf_results = {}
+        self._detect_cache = {}
+        # Chaque ffuf actif doit pouvoir recevoir au moins 2 threads et, avec une limite globale, 1 req/s
+        self._ffuf_slot_count = min(self.parallel, self.threads // 2)
+        if self.global_rate:
+            self._ffuf_slot_count = min(self._ffuf_slot_count, self.global_rate)
+        self._ffuf_slots = threading.BoundedSemaphore(self._ffuf_slot_count)
+        self._pending_ffuf = 0
+        self._active_lock = threading.Lock()
+        self._output_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ffuf_procs = set()
+        self._procs_lock = threading.Lock()
         
         self._load_technologies()
+        self._load_templates()
     
     def _load_technologies(self):
         """Charge la liste des technologies disponibles depuis les dictionnaires"""
@@ -111,6 +196,8 @@ class Intervention:
         
         pattern = re.compile(r'^(.+?)_(short|long)\.txt$')
         techs = set()
+        size_cache = load_wordlist_cache()
+        cached_entries = dict(size_cache)
         
         for file in self.dict_path.glob("*.txt"):
             match = pattern.match(file.name)
@@ -124,151 +211,261 @@ class Intervention:
                 
                 if dict_type == self.mode or (dict_type == "long" and self.mode == "long"):
                     self.tech_to_dict[tech_name][dict_type] = str(file)
+                    try:
+                        size = wordlist_line_count(file, size_cache)
+                    except OSError as e:
+                        # Lien cassé ou fichier illisible : ffuf utilisera le profil par défaut
+                        console.print(f"[yellow]⚠[/yellow] Impossible de lire {file.name}: {e.strerror or e}")
+                        size = None
+                    self.tech_to_dict[tech_name][dict_type + "_size"] = size
         
-        if self.verbose:
-            console.print(f"[green]✓[/green] {len(techs)} technologies trouvées dans les dictionnaires")
-    
-    def _normalize_tech_name(self, tech_name: str) -> str:
-        """Normalise le nom de la techno pour correspondre aux dictionnaires"""
-        tech_name = tech_name.lower()
-        tech_name = tech_name.replace(" ", "-")
-        tech_name = tech_name.replace("_", "-")
-        tech_name = tech_name.replace(".", "")
-        tech_name = tech_name.replace("detect", "")
-        tech_name = tech_name.replace("detection", "")
-        tech_name = tech_name.replace("-detect", "")
-        tech_name = tech_name.replace("-detection", "")
-        tech_name = tech_name.strip("-")
-        return tech_name
-    
-    def _find_matching_dict(self, tech_name: str) -> str:
-        """Trouve le dictionnaire correspondant à une techno"""
-        normalized = self._normalize_tech_name(tech_name)
+        if size_cache != cached_entries:
+            save_wordlist_cache(size_cache)
         
-        if normalized in self.tech_to_dict:
-            if self.mode in self.tech_to_dict[normalized]:
-                return self.tech_to_dict[normalized][self.mode]
-            elif "long" in self.tech_to_dict[normalized]:
-                return self.tech_to_dict[normalized]["long"]
-            elif "short" in self.tech_to_dict[normalized]:
-                return self.tech_to_dict[normalized]["short"]
-        
-        for tech in self.tech_to_dict.keys():
-            if normalized == tech:
-                if self.mode in self.tech_to_dict[tech]:
-                    return self.tech_to_dict[tech][self.mode]
-                elif "long" in self.tech_to_dict[tech]:
-                    return self.tech_to_dict[tech]["long"]
-                elif "short" in self.tech_to_dict[tech]:
-                    return self.tech_to_dict[tech]["short"]
-            elif normalized in tech or tech in normalized:
-                if self.mode in self.tech_to_dict[tech]:
-                    return self.tech_to_dict[tech][self.mode]
-                elif "long" in self.tech_to_dict[tech]:
-                    return self.tech_to_dict[tech]["long"]
-                elif "short" in self.tech_to_dict[tech]:
-                    return self.tech_to_dict[tech]["short"]
+        self._build_dict_index()
         
-        return None
+        if self.verbose:
+            console.print(f"[green]✓[/green] {len(techs)} technologies trouvées dans les dictionnaires")
     
-    def detect_technologies(self, url: str) -> Set[str]:
-        """Détecte les technologies avec nuclei"""
-        detected = set()
-        
+    def _load_templates(self):
+        """Résout une fois pour toutes les templates nuclei à utiliser"""
         tech_detect_path = self.nuclei_templates_path / "http/technologies/tech-detect.yaml"
         favicon_path = self.nuclei_templates_path / "http/technologies/favicon-detect.yaml"
         # exposures_path = self.nuclei_templates_path / "http/exposures"
         # exposed_panels_path = self.nuclei_templates_path / "http/exposed-panels"
         
-        templates_to_use = []
+        self._template_args = []
         if tech_detect_path.exists():
-            templates_to_use.extend(["-t", str(tech_detect_path)])
+            self._template_args.extend(["-t", str(tech_detect_path)])
             if self.verbose:
                 console.print(f"  [dim]Template trouvé: {tech_detect_path}[/dim]")
         if favicon_path.exists():
-            templates_to_use.extend(["-t", str(favicon_path)])
+            self._template_args.extend(["-t", str(favicon_path)])
             if self.verbose:
                 console.print(f"  [dim]Template trouvé: {favicon_path}[/dim]")
         # if exposures_path.exists():
-        #     templates_to_use.extend(["-t", str(exposures_path)])
+        #     self._template_args.extend(["-t", str(exposures_path)])
         #     if self.verbose:
         #         console.print(f"  [dim]Dossier trouvé: {exposures_path}[/dim]")
         # if exposed_panels_path.exists():
-        #     templates_to_use.extend(["-t", str(exposed_panels_path)])
+        #     self._template_args.extend(["-t", str(exposed_panels_path)])
         #     if self.verbose:
         #         console.print(f"  [dim]Dossier trouvé: {exposed_panels_path}[/dim]")
         
-        if not templates_to_use:
+        if not self._template_args:
             console.print("[yellow]⚠[/yellow] Aucun template nuclei trouvé")
             if self.verbose:
                 console.print(f"  [dim]Recherche dans: {self.nuclei_templates_path}[/dim]")
+    
+    def _build_dict_index(self):
+        """Précalcule les index de recherche des dictionnaires par nom normalisé"""
+        self._dict_by_tech = {}
+        self._dict_sizes = {}
+        for tech, dicts in self.tech_to_dict.items():
+            for dict_type in (self.mode, "long", "short"):
+                if dict_type in dicts:
+                    self._dict_by_tech[tech] = dicts[dict_type]
+                    self._dict_sizes[dicts[dict_type]] = dicts[dict_type + "_size"]
+                    break
+        
+        self._norm_index = {}
+        for tech in self._dict_by_tech:
+            self._norm_index.setdefault(self._normalize_tech_name(tech), tech)
+        
+        norms = [norm for norm in self._norm_index if norm]
+        
+        # Recherche "techno du dictionnaire contenue dans le nom détecté" : la plus longue d'abord
+        longest_first = sorted(norms, key=len, reverse=True)
+        self._contained_re = re.compile("|".join(map(re.escape, longest_first))) if norms else None
+        
+        # Recherche "nom détecté contenu dans une techno du dictionnaire" : la plus courte d'abord
+        self._containing_norms = sorted(norms, key=len)
+        self._containing_blob = "\n".join(self._containing_norms)
+        self._containing_offsets = []
+        offset = 0
+        for norm in self._containing_norms:
+            self._containing_offsets.append(offset)
+            offset += len(norm) + 1
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _normalize_tech_name(tech_name: str) -> str:
+        """Normalise le nom de la techno pour correspondre aux dictionnaires"""
+        tech_name = tech_name.lower().translate(_TECH_NAME_TRANS)
+        return _DETECT_SUFFIX_RE.sub("", tech_name).strip("-")
+    
+    def _find_matching_dict(self, tech_name: str) -> str:
+        """Trouve le dictionnaire correspondant à une techno"""
+        if tech_name in self._dict_by_tech:
+            return self._dict_by_tech[tech_name]
+        
+        normalized = self._normalize_tech_name(tech_name)
+        if not normalized:
+            return None
+        
+        if normalized in self._dict_by_tech:
+            return self._dict_by_tech[normalized]
+        
+        tech = self._norm_index.get(normalized)
+        if tech:
+            return self._dict_by_tech[tech]
+        
+        if self._contained_re:
+            match = self._contained_re.search(normalized)
+            if match:
+                return self._dict_by_tech[self._norm_index[match.group(0)]]
+        
+        index = self._containing_blob.find(normalized)
+        if index != -1:
+            norm = self._containing_norms[bisect.bisect_right(self._containing_offsets, index) - 1]
+            return self._dict_by_tech[self._norm_index[norm]]
+        
+        return None
+    
+    def _host_key(self, value: str) -> Tuple[str, str]:
+        """Clé (scheme, netloc) utilisée pour rattacher les résultats nuclei aux URLs"""
+        parsed = urlparse(value if "://" in value else f"//{value}")
+        scheme = parsed.scheme.lower()
+        netloc = parsed.netloc.lower()
+        default_port = {"http": ":80", "https": ":443"}.get(scheme)
+        if default_port and netloc.endswith(default_port):
+            netloc = netloc[:-len(default_port)]
+        return scheme, netloc
+    
+    def _matching_hosts(self, target: str, hosts: Dict[Tuple[str, str], Set[str]]) -> List[Tuple[str, str]]:
+        """Clés des hôtes scannés correspondant à une cible rapportée par nuclei"""
+        scheme, netloc = self._host_key(target)
+        if (scheme, netloc) in hosts:
+            return [(scheme, netloc)]
+        # Une URL saisie sans scheme correspond à celui que nuclei a retenu
+        if ("", netloc) in hosts:
+            return [("", netloc)]
+        if not scheme:
+            return [host for host in hosts if host[1] == netloc]
+        return []
+    
+    def detect_technologies(self, urls: List[str]) -> Dict[str, Set[str]]:
+        """Détecte les technologies des URLs en ne scannant qu'une fois chaque hôte"""
+        targets = {}
+        for url in urls:
+            host = self._host_key(url)
+            if host not in self._detect_cache:
+                targets.setdefault(host, url)
+        
+        if targets:
+            self._detect_cache.update(self._scan_hosts(targets))
+        
+        return {url: self._detect_cache.get(self._host_key(url), set()) for url in urls}
+    
+    def _scan_hosts(self, targets: Dict[Tuple[str, str], str]) -> Dict[Tuple[str, str], Set[str]]:
+        """Détecte les technologies avec nuclei en une seule invocation pour tous les hôtes"""
+        detected = {host: set() for host in targets}
+        
+        if not self._template_args:
             return detected
         
+        with tempfile.NamedTemporaryFile("w", prefix="intervention_urls_", suffix=".txt", delete=False) as f:
+            f.write("\n".join(targets.values()) + "\n")
+            urls_file = f.name
+        
         cmd = [
             "nuclei",
-            "-u", url,
-        ] + templates_to_use + [
+            "-l", urls_file,
+        ] + self._template_args + [
             "-j"
         ]
+        # -rl ne doit que réduire le débit par défaut de nuclei, jamais l'augmenter
+        if self.global_rate and self.global_rate < NUCLEI_DEFAULT_RATE_LIMIT:
+            cmd += ["-rl", str(self.global_rate)]
         
         try:
             if self.verbose:
-                console.print(f"[cyan]🔍[/cyan] Détection des technologies pour {url}")
+                console.print(f"[cyan]🔍[/cyan] Détection des technologies pour {len(targets)} hôte(s)")
                 console.print(f"  [dim]Commande: {' '.join(cmd)}[/dim]")
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            timeout = 300 * len(targets)
+            timed_out = threading.Event()
+            line_count = 0
             
-            if result.returncode != 0:
+            with tempfile.TemporaryFile() as stderr_file:
+                proc = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                    bufsize=1,
+                    text=True
+                )
+                
+                def kill_on_timeout():
+                    timed_out.set()
+                    proc.kill()
+                
+                timer = threading.Timer(timeout, kill_on_timeout)
+                timer.start()
+                try:
+                    for line in proc.stdout:
+                        if not line.strip():
+                            continue
+                        line_count += 1
+                        try:
+                            data = orjson.loads(line)
+                            if not isinstance(data, dict):
+                                continue
+                            tech_name = None
+                            
+                            if "matcher-name" in data:
+                                tech_name = data["matcher-name"]
+                            elif isinstance(data.get("info"), dict):
+                                if "name" in data["info"]:
+                                    tech_name = data["info"]["name"]
+                                elif "tags" in data["info"]:
+                                    tags = data["info"]["tags"]
+                                    if isinstance(tags, list) and tags:
+                                        tech_name = tags[0]
+                            
+                            target = data.get("url") or data.get("matched-at") or data.get("host")
+                            if tech_name and target:
+                                tech_name = self._normalize_tech_name(tech_name)
+                                for host in self._matching_hosts(target, detected):
+                                    detected[host].add(tech_name)
+                                if self.verbose:
+                                    console.print(f"  [green]✓[/green] {tech_name} ({target})")
+                        except orjson.JSONDecodeError:
+                            if self.verbose:
+                                console.print(f"  [dim]Ligne non-JSON ignorée: {line[:50]}...[/dim]")
+                            continue
+                except BaseException:
+                    proc.kill()
+                    raise
+                finally:
+                    timer.cancel()
+                    proc.stdout.close()
+                    returncode = proc.wait()
+                
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode(errors="replace")
+            
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            
+            if returncode != 0:
                 if self.verbose:
-                    console.print(f"[yellow]⚠[/yellow] nuclei a retourné le code {result.returncode}")
-                    if result.stderr:
-                        console.print(f"[yellow]Erreur: {result.stderr}[/yellow]")
+                    console.print(f"[yellow]⚠[/yellow] nuclei a retourné le code {returncode}")
+                    if stderr:
+                        console.print(f"[yellow]Erreur: {stderr}[/yellow]")
                 else:
                     console.print(f"[yellow]⚠[/yellow] Erreur lors de la détection")
             
-            if result.stdout:
-                for line in result.stdout.splitlines():
-                    if not line.strip():
-                        continue
-                    try:
-                        data = json.loads(line)
-                        tech_name = None
-                        
-                        if "matcher-name" in data:
-                            tech_name = data["matcher-name"]
-                        elif "info" in data:
-                            if "name" in data["info"]:
-                                tech_name = data["info"]["name"]
-                            elif "tags" in data["info"]:
-                                tags = data["info"]["tags"]
-                                if isinstance(tags, list) and tags:
-                                    tech_name = tags[0]
-                        
-                        if tech_name:
-                            tech_name = self._normalize_tech_name(tech_name)
-                            detected.add(tech_name)
-                            if self.verbose:
-                                console.print(f"  [green]✓[/green] {tech_name}")
-                    except json.JSONDecodeError:
-                        if self.verbose:
-                            console.print(f"  [dim]Ligne non-JSON ignorée: {line[:50]}...[/dim]")
-                        continue
-            
             if self.verbose:
-                if result.stderr:
-                    console.print(f"  [dim]stderr: {result.stderr[:200]}...[/dim]" if len(result.stderr) > 200 else f"  [dim]stderr: {result.stderr}[/dim]")
-                console.print(f"  [dim]Code de retour: {result.returncode}[/dim]")
-                console.print(f"  [dim]Lignes de sortie: {len(result.stdout.splitlines())}[/dim]")
-                if not detected:
+                if stderr:
+                    console.print(f"  [dim]stderr: {stderr[:200]}...[/dim]" if len(stderr) > 200 else f"  [dim]stderr: {stderr}[/dim]")
+                console.print(f"  [dim]Code de retour: {returncode}[/dim]")
+                console.print(f"  [dim]Lignes de sortie: {line_count}[/dim]")
+                if not any(detected.values()):
                     console.print(f"  [yellow]⚠[/yellow] Aucune sortie de nuclei (stdout vide)")
             
         except subprocess.TimeoutExpired:
-            console.print(f"[yellow]⚠[/yellow] Timeout lors de la détection pour {url}")
+            console.print(f"[yellow]⚠[/yellow] Timeout lors de la détection")
         except FileNotFoundError:
             console.print("[red]Erreur: nuclei n'est pas installé ou n'est pas dans le PATH[/red]")
             console.print("[yellow]Installez nuclei: https://github.com/projectdiscovery/nuclei#installation[/yellow]")
@@ -278,145 +475,261 @@ class Intervention:
             if self.verbose:
                 import traceback
                 console.print(f"[dim]{traceback.format_exc()}[/dim]")
+        finally:
+            os.remove(urls_file)
         
         return detected
     
-    def run_ffuf(self, url: str, wordlist: str, tech_name: str) -> List[Dict]:
-        """Lance ffuf avec un dictionnaire"""
+    def _ffuf_profile(self, wordlist: str) -> Tuple[Optional[int], int, int]:
+        """Choisit threads max et timeout ffuf selon la taille du dictionnaire"""
+        size = self._dict_sizes.get(wordlist)
+        if size is None:
+            return None, 50, 3600
+        
+        for max_lines, max_threads, timeout in FFUF_SIZE_BUCKETS:
+            if max_lines is None or size <= max_lines:
+                return size, max_threads, timeout
+    
+    @contextmanager
+    def _ffuf_budget(self, max_threads: int):
+        """Réserve un créneau ffuf et calcule sa part du budget global de threads et de requêtes/s"""
+        with self._ffuf_slots:
+            with self._active_lock:
+                # Les jobs encore à terminer ne font que diminuer : les parts déjà attribuées
+                # restent inférieures à la nouvelle, donc la somme des threads comme des req/s
+                # ne dépasse jamais les budgets globaux
+                sharing = min(self._ffuf_slot_count, max(1, self._pending_ffuf))
+            
+            threads = min(max_threads, self.threads // sharing)
+            rate = self.global_rate // sharing if self.global_rate else 0
+            try:
+                yield threads, rate
+            finally:
+                with self._active_lock:
+                    self._pending_ffuf = max(0, self._pending_ffuf - 1)
+    
+    def _register_ffuf_jobs(self, count: int):
+        """Annonce des jobs ffuf à venir pour le partage des budgets globaux de threads et de débit"""
+        with self._active_lock:
+            self._pending_ffuf += count
+    
+    def stop(self):
+        """Arrête l'intervention : plus aucun ffuf n'est lancé et ceux en cours sont tués"""
+        self._stop.set()
+        with self._procs_lock:
+            for proc in self._ffuf_procs:
+                proc.kill()
+    
+    def _run_ffuf_process(self, cmd: List[str], timeout: int) -> subprocess.CompletedProcess:
+        """Équivalent de subprocess.run pour ffuf, avec un processus que stop() peut tuer"""
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with self._procs_lock:
+            self._ffuf_procs.add(proc)
+        try:
+            if self._stop.is_set():
+                proc.kill()
+            try:
+                stdout, stderr = proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                stdout, stderr = proc.communicate()
+                raise subprocess.TimeoutExpired(cmd, timeout, output=stdout, stderr=stderr)
+        finally:
+            with self._procs_lock:
+                self._ffuf_procs.discard(proc)
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+    
+    def _parse_ffuf_output(self, output) -> List[Dict]:
+        """Parse la sortie JSON lines de ffuf (str ou bytes, éventuellement tronquée)"""
         results = []
+        if not output:
+            return results
+        
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                data = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                results.append(data)
+        return results
+    
+    def run_ffuf(self, url: str, wordlist: str, tech_name: str, log: List[str] = None) -> List[Dict]:
+        """Lance ffuf avec un dictionnaire (messages ajoutés à log s'il est fourni)"""
+        results = []
+        emit = log.append if log is not None else console.print
         
         parsed_url = urlparse(url)
         base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
         
-        output_file = f"/tmp/ffuf_{tech_name}_{hash(url)}.json"
-        
         cmd = [
             "ffuf",
             "-r",
             "-u", f"{base_url}/FUZZ",
             "-w", wordlist,
-            "-o", output_file,
-            "-of", "json",
+            "-json",
             "-mc", "200,201,202,204,301,302,307,401,403",
-            "-t", "50",
             "-s"
         ]
+        size, max_threads, timeout = self._ffuf_profile(wordlist)
+        if self._stop.is_set():
+            return results
         try:
-            if self.verbose:
-                console.print(f"  [cyan]🚀[/cyan] Lancement ffuf avec {tech_name} ({self.mode})")
+            with self._ffuf_budget(max_threads) as (threads, rate):
+                # L'arrêt a pu être demandé pendant l'attente d'un créneau
+                if self._stop.is_set():
+                    return results
+                
+                if rate and size:
+                    # Avec une limite de débit, le dictionnaire doit pouvoir être parcouru en entier
+                    timeout = max(timeout, int(size / rate * 1.2))
+                
+                if self.verbose:
+                    emit(f"  [cyan]🚀[/cyan] Lancement ffuf avec {tech_name} ({self.mode}, {threads} threads, rate {rate or 'illimité'}, timeout {timeout}s)")
+                
+                result = self._run_ffuf_process(cmd + ["-t", str(threads), "-rate", str(rate)], timeout)
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=3600
-            )
+            if result.returncode != 0 and not self._stop.is_set():
+                stderr = result.stderr.strip()
+                if self.verbose:
+                    emit(f"[yellow]⚠[/yellow] ffuf a retourné le code {result.returncode} pour {tech_name}")
+                    if stderr:
+                        emit(f"[yellow]Erreur: {stderr}[/yellow]")
+                else:
+                    details = f": {stderr.splitlines()[0]}" if stderr else ""
+                    emit(f"[yellow]⚠[/yellow] Erreur lors de ffuf pour {tech_name}{details}")
             
-            if os.path.exists(output_file):
-                with open(output_file, 'r') as f:
-                    ffuf_data = json.load(f)
-                    if "results" in ffuf_data:
-                        results = ffuf_data["results"]
-                
-                os.remove(output_file)
+            results = self._parse_ffuf_output(result.stdout)
             
-        except subprocess.TimeoutExpired:
-            console.print(f"[yellow]⚠[/yellow] Timeout lors de ffuf pour {tech_name}")
+        except subprocess.TimeoutExpired as e:
+            # On garde les résultats que ffuf a déjà émis avant d'être interrompu
+            results = self._parse_ffuf_output(e.stdout)
+            emit(f"[yellow]⚠[/yellow] Timeout lors de ffuf pour {tech_name} ({len(results)} résultat(s) partiel(s))")
         except FileNotFoundError:
             console.print("[red]Erreur: ffuf n'est pas installé ou n'est pas dans le PATH[/red]")
             sys.exit(1)
         except Exception as e:
             if self.verbose:
-                console.print(f"[red]Erreur lors de ffuf: {e}[/red]")
+                emit(f"[red]Erreur lors de ffuf: {e}[/red]")
         
         return results
     
     def analyze_results(self, results: List[Dict]) -> List[Dict]:
         """Analyse les résultats par longueur et occurrence"""
-        length_counts = defaultdict(int)
-        
-        for result in results:
-            length = result.get("length", 0)
-            length_counts[length] += 1
-        
-        interesting_results = []
-        for result in results:
-            length = result.get("length", 0)
-            count = length_counts[length]
-            
-            if count <= self.occurrence:
-                interesting_results.append({
-                    **result,
-                    "occurrence_count": count
-                })
+        length_counts = Counter(result.get("length", 0) for result in results)
         
-        return interesting_results
+        return [
+            {**result, "occurrence_count": length_counts[result.get("length", 0)]}
+            for result in results
+            if length_counts[result.get("length", 0)] <= self.occurrence
+        ]
     
-    def process_url(self, url: str):
-        """Traite une URL complète"""
-        console.print(f"\n[bold blue]📋 Traitement de {url}[/bold blue]")
-        
-        detected_techs = self.detect_technologies(url)
-        self.detected_techs[url] = detected_techs
+    def _group_dicts(self, detected_techs: Set[str]) -> Dict[str, List[str]]:
+        """Regroupe les technologies détectées par dictionnaire à utiliser"""
+        dict_to_techs = defaultdict(list)
+        for tech in sorted(detected_techs):
+            dict_path = self._find_matching_dict(tech)
+            if dict_path:
+                dict_to_techs[dict_path].append(tech)
+        return dict_to_techs
+    
+    def process_url(self, url: str, detected_techs: Set[str], dict_to_techs: Dict[str, List[str]] = None):
+        """Traite une URL complète à partir des technologies détectées"""
+        # Les messages sont regroupés pour être affichés d'un bloc avec les résultats de l'URL
+        log = [f"\n[bold blue]📋 Traitement de {url}[/bold blue]"]
         
         if not detected_techs:
-            console.print(f"[yellow]⚠[/yellow] Aucune technologie détectée pour {url}")
+            log.append(f"[yellow]⚠[/yellow] Aucune technologie détectée pour {url}")
+            with self._output_lock:
+                for message in log:
+                    console.print(message)
             return
         
-        console.print(f"[green]✓[/green] {len(detected_techs)} technologie(s) détectée(s)")
+        log.append(f"[green]✓[/green] {len(detected_techs)} technologie(s) détectée(s)")
         
         all_results = []
         tech_results_map = {}
         
-        for tech in detected_techs:
-            dict_path = self._find_matching_dict(tech)
-            
-            if not dict_path:
-                if self.verbose:
-                    console.print(f"  [yellow]⚠[/yellow] Pas de dictionnaire trouvé pour {tech}")
+        if dict_to_techs is None:
+            dict_to_techs = self._group_dicts(detected_techs)
+            self._register_ffuf_jobs(len(dict_to_techs))
+        
+        if self.verbose:
+            matched = set()
+            for dict_path, techs in dict_to_techs.items():
+                for tech in techs:
+                    log.append(f"  [cyan]📚[/cyan] Dictionnaire trouvé pour {tech}: {Path(dict_path).name}")
+                matched.update(techs)
+            for tech in sorted(detected_techs - matched):
+                log.append(f"  [yellow]⚠[/yellow] Pas de dictionnaire trouvé pour {tech}")
+        
+        dict_results = {}
+        if dict_to_techs:
+            executor = ThreadPoolExecutor(max_workers=min(len(dict_to_techs), self.parallel))
+            try:
+                futures = {
+                    dict_path: executor.submit(self.run_ffuf, url, dict_path, "+".join(techs), log)
+                    for dict_path, techs in dict_to_techs.items()
+                }
+                for dict_path, future in futures.items():
+                    dict_results[dict_path] = future.result()
+            except BaseException:
+                self.stop()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+        
+        if self._stop.is_set():
+            return
+        
+        for dict_path, techs in dict_to_techs.items():
+            results = dict_results.get(dict_path)
+            if not results:
                 continue
             
-            if self.verbose:
-                console.print(f"  [cyan]📚[/cyan] Dictionnaire trouvé pour {tech}: {Path(dict_path).name}")
-            
-            results = self.run_ffuf(url, dict_path, tech)
+            analyzed = self.analyze_results(results)
+            if not analyzed:
+                continue
             
-            if results:
-                analyzed = self.analyze_results(results)
-                if analyzed:
-                    for result in analyzed:
-                        result["tech"] = tech
-                        result["dict_used"] = Path(dict_path).name
-                    all_results.extend(analyzed)
-                    tech_results_map[tech] = analyzed
-                    self.ffuf_results[f"{url}_{tech}"] = analyzed
-                    
-                    if self.verbose:
-                        console.print(f"  [green]✓[/green] {len(analyzed)} résultat(s) intéressant(s) pour {tech}")
-        
-        if all_results:
-            self._save_results(url, all_results, tech_results_map)
-            self._display_results(url, all_results, tech_results_map)
-        else:
-            console.print(f"[yellow]⚠[/yellow] Aucun résultat intéressant trouvé pour {url}")
+            for tech in techs:
+                tech_analyzed = [
+                    {**result, "tech": tech, "dict_used": Path(dict_path).name}
+                    for result in analyzed
+                ]
+                all_results.extend(tech_analyzed)
+                tech_results_map[tech] = tech_analyzed
+                self.ffuf_results[f"{url}_{tech}"] = tech_analyzed
+                
+                if self.verbose:
+                    log.append(f"  [green]✓[/green] {len(tech_analyzed)} résultat(s) intéressant(s) pour {tech}")
+        
+        with self._output_lock:
+            for message in log:
+                console.print(message)
+            if all_results:
+                self._save_results(url, all_results, tech_results_map)
+                self._display_results(url, all_results, tech_results_map)
+            else:
+                console.print(f"[yellow]⚠[/yellow] Aucun résultat intéressant trouvé pour {url}")
     
     def _save_results(self, url: str, results: List[Dict], tech_results_map: Dict[str, List[Dict]]):
         """Sauvegarde les résultats en JSON"""
         safe_url = url.replace("://", "_").replace("/", "_").replace(":", "_")
         output_file = f"intervention_results_{safe_url}.json"
         
-        with open(output_file, 'w') as f:
-            json.dump({
-                "url": url,
-                "mode": self.mode,
-                "occurrence_threshold": self.occurrence,
-                "technologies_detected": list(tech_results_map.keys()),
-                "results_by_tech": {
-                    tech: len(results_list) 
-                    for tech, results_list in tech_results_map.items()
-                },
-                "results": results
-            }, f, indent=2)
+        Path(output_file).write_bytes(orjson.dumps({
+            "url": url,
+            "mode": self.mode,
+            "occurrence_threshold": self.occurrence,
+            "technologies_detected": list(tech_results_map.keys()),
+            "results_by_tech": {
+                tech: len(results_list) 
+                for tech, results_list in tech_results_map.items()
+            },
+            "results": results
+        }, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         
         console.print(f"[green]✓[/green] Résultats sauvegardés dans {output_file}")
     
@@ -437,7 +750,10 @@ class Intervention:
         table.add_column("Taille", style="yellow", justify="right")
         table.add_column("Occurrences", style="magenta", justify="center")
         
-        for result in sorted(results, key=lambda x: (x.get("occurrence_count", 0), x.get("length", 0))):
+        rows = [(result.get("occurrence_count", 0), result.get("length", 0), result) for result in results]
+        rows.sort(key=itemgetter(0, 1))
+        
+        for _, _, result in rows:
             url_path = result.get("url", "")
             tech = result.get("tech", "N/A")
             status = str(result.get("status", ""))
@@ -455,12 +771,33 @@ class Intervention:
             f"[bold]Intervention[/bold]\n"
             f"Mode: {self.mode}\n"
             f"Seuil d'occurrence: {self.occurrence}\n"
+            f"ffuf en parallèle: {self.parallel}\n"
+            f"Budget threads ffuf: {self.threads}\n"
+            f"Limite globale: {f'{self.global_rate} req/s' if self.global_rate else 'aucune'}\n"
             f"URLs: {len(urls)}",
             title="Configuration"
         ))
         
-        for url in urls:
-            self.process_url(url)
+        detections = self.detect_technologies(urls)
+        
+        # Tous les jobs ffuf sont connus avant le premier lancement pour répartir le débit global
+        plans = {url: self._group_dicts(detections.get(url, set())) for url in urls}
+        self._register_ffuf_jobs(sum(len(plan) for plan in plans.values()))
+        
+        executor = ThreadPoolExecutor(max_workers=self.parallel)
+        try:
+            futures = [
+                executor.submit(self.process_url, url, detections.get(url, set()), plans[url])
+                for url in urls
+            ]
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            # Ctrl-C ou erreur fatale : on annule les URLs en attente et on tue les ffuf en cours
+            self.stop()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
         
         console.print("\n[bold green]✓ Intervention terminée[/bold green]")
 
@@ -496,6 +833,24 @@ def main():
         default=10,
         help="Nombre maximum d'occurrences pour considérer un résultat intéressant (défaut: 10)"
     )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=8,
+        help="Nombre maximum de processus ffuf lancés en parallèle (défaut: 8)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=400,
+        help="Budget total de threads partagé entre les ffuf actifs (défaut: 400)"
+    )
+    parser.add_argument(
+        "--global-rate",
+        type=int,
+        default=0,
+        help="Nombre maximum de requêtes/s partagé entre nuclei et les ffuf actifs, 0 = illimité (défaut: 0)"
+    )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -515,17 +870,25 @@ def main():
     urls = []
     for url_arg in args.urls:
         if os.path.isfile(url_arg):
-            with open(url_arg, 'r') as f:
-                urls.extend([line.strip() for line in f if line.strip()])
+            with open(url_arg, 'rb') as f:
+                urls.extend(line.decode().strip() for line in f.read().splitlines() if line.strip())
         else:
             urls.append(url_arg)
     
+    unique_urls = list(dict.fromkeys(urls))
+    if args.verbose and len(unique_urls) < len(urls):
+        console.print(f"[dim]{len(urls) - len(unique_urls)} URL(s) en double ignorée(s)[/dim]")
+    urls = unique_urls
+    
     intervention = Intervention(
         dict_path=args.dict,
         nuclei_templates_path=args.nuclei_templates,
         mode=args.mode,
         occurrence=args.occurrence,
-        verbose=args.verbose
+        verbose=args.verbose,
+        parallel=args.parallel,
+        threads=args.threads,
+        global_rate=args.global_rate
     )
     
     intervention.run(urls)